@@ -1,54 +1,183 @@
 import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import partial
+from pathlib import Path
+
+import numpy as np
 import pandas as pd
+import xlsxwriter
 
 DB_PATH = "mock_game2.db"
 OUTPUT_XLSX = "kpi_dashboard_data.xlsx"
 
-conn = sqlite3.connect(DB_PATH)
+# Optional columnar copy of every KPI table for notebooks / BI tools,
+# one <name>.parquet per sheet (needs pyarrow). None = Excel only.
+OUTPUT_PARQUET_DIR = None   # e.g. Path("kpi")
+
+
+def connect() -> sqlite3.Connection:
+    """
+    Open a connection with read-heavy analytics settings: big page cache,
+    memory-mapped reads and temp B-trees (GROUP BY / DISTINCT) in RAM.
+    """
+    conn = sqlite3.connect(DB_PATH)
+    conn.execute("PRAGMA cache_size = -262144;")    # ~256 MB page cache
+    conn.execute("PRAGMA mmap_size = 268435456;")   # 256 MB
+    conn.execute("PRAGMA temp_store = MEMORY;")
+    return conn
+
+
+def run_read_only(read):
+    """
+    Call read(conn) on a fresh query_only connection.
+
+    Every worker thread gets its own connection (sqlite3 connections must
+    not be shared between threads); in WAL mode readers never block each
+    other, and sqlite3 releases the GIL while SQLite is stepping.
+    """
+    conn = connect()
+    try:
+        conn.execute("PRAGMA query_only = 1;")
+        return read(conn)
+    finally:
+        conn.close()
+
+
+def read_records(conn: sqlite3.Connection, sql: str, dtypes=None) -> pd.DataFrame:
+    """
+    Run a query with a small result and return it as a DataFrame.
+
+    Plain fetchall + DataFrame.from_records, skipping read_sql_query's
+    chunked fetch and dtype inference machinery; pass `dtypes` to pin the
+    column types instead.
+    """
+    cur = conn.execute(sql)
+    columns = [col[0] for col in cur.description]
+    df = pd.DataFrame.from_records(cur.fetchall(), columns=columns)
+    return df.astype(dtypes) if dtypes else df
+
+
+conn = connect()
+
+# WAL so the refresh below doesn't need a rollback journal + fsync per
+# statement, and so the parallel readers further down don't block.
+conn.execute("PRAGMA journal_mode = WAL;")
+conn.execute("PRAGMA synchronous = NORMAL;")
 
 # -----------------------------
-#    DAU per day
+#    Indexes on the exact day expressions the KPI queries group by
+#
+#    Both are covering, so SQLite can walk them in day order instead of
+#    scanning the table and sorting into a temp B-tree. Created once and
+#    persisted in the DB.
 # -----------------------------
-dau_sql = """
-SELECT
-    substr(session_start_utc, 1, 10) AS day,   -- YYYY-MM-DD
-    COUNT(DISTINCT player_id) AS dau
-FROM sessions
-GROUP BY day
-ORDER BY day;
+kpi_index_sql = """
+CREATE INDEX IF NOT EXISTS idx_sessions_day_player
+    ON sessions (substr(session_start_utc, 1, 10), player_id);
+
+CREATE INDEX IF NOT EXISTS idx_purchases_day_price
+    ON purchases (substr(purchase_time_utc, 1, 10), price_eur);
 """
 
-dau_df = pd.read_sql_query(dau_sql, conn)
+conn.executescript(kpi_index_sql)
 
 # -----------------------------
-#    WAU per calendar week (YYYY-WW)
-#    WAU = unique players per week
+#    Materialized rollups, refreshed incrementally on every run
+#
+# - daily_player_activity: one row per (day, player_id), so every KPI
+#   below reads active player-days instead of raw sessions
+# - first_session: each player's first active day (retention cohorts)
+#
+#    Sessions are treated as append-only: only days >= the latest
+#    materialized day are (re)scanned, INSERT OR IGNORE tops up a
+#    partially loaded day. A player whose first day falls in that window
+#    can only appear in the newly scanned rows, and players that are
+#    already known keep their (earlier) first day.
 # -----------------------------
-wau_sql = """
-SELECT
-    strftime('%Y-%W', session_start_utc) AS week,   -- e.g. 2025-03 (year-week)
-    COUNT(DISTINCT player_id) AS wau
+rollup_tables_sql = """
+CREATE TABLE IF NOT EXISTS daily_player_activity (
+    day        TEXT NOT NULL,      -- YYYY-MM-DD
+    player_id  INTEGER NOT NULL,
+    PRIMARY KEY (day, player_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS first_session (
+    player_id  INTEGER PRIMARY KEY,
+    first_day  TEXT NOT NULL       -- YYYY-MM-DD
+);
+"""
+
+activity_refresh_sql = """
+INSERT OR IGNORE INTO daily_player_activity (day, player_id)
+SELECT DISTINCT
+    substr(session_start_utc, 1, 10) AS day,
+    player_id
 FROM sessions
-GROUP BY week
-ORDER BY week;
+WHERE substr(session_start_utc, 1, 10) >= :since;
+"""
+
+first_session_refresh_sql = """
+INSERT OR IGNORE INTO first_session (player_id, first_day)
+SELECT
+    player_id,
+    MIN(day) AS first_day
+FROM daily_player_activity
+WHERE day >= :since
+GROUP BY player_id;
 """
 
-wau_df = pd.read_sql_query(wau_sql, conn)
+conn.executescript(rollup_tables_sql)
+(since,) = conn.execute(
+    "SELECT COALESCE(MAX(day), '') FROM daily_player_activity;"
+).fetchone()
+with conn:
+    conn.execute(activity_refresh_sql, {"since": since})
+    conn.execute(first_session_refresh_sql, {"since": since})
+
+# player_id is already an INTEGER PRIMARY KEY (no string keys to hash);
+# in pandas it is held as int32 whenever the ids fit, which halves the
+# key width of every groupby/nunique/isin over player-days. MAX on the
+# rowid alias is a single B-tree lookup.
+(max_player_id,) = conn.execute("SELECT COALESCE(MAX(player_id), 0) FROM players;").fetchone()
+player_id_dtype = "int32" if max_player_id <= np.iinfo(np.int32).max else "int64"
+conn.close()
 
 # -----------------------------
-#    MAU per calendar month (YYYY-MM)
-#    MAU = unique players per month
+#    Daily active (day, player_id) pairs
+#
+#    DAU/WAU/MAU and retention are all derived from this set below.
+#
+#    This is by far the largest result, so it is streamed in chunks and
+#    each chunk's day strings are swapped for categorical codes before
+#    the next one is fetched; the full result never exists as Python
+#    tuples/strings at once.
 # -----------------------------
-mau_sql = """
-SELECT
-    substr(session_start_utc, 1, 7) AS month,   -- YYYY-MM
-    COUNT(DISTINCT player_id) AS mau
-FROM sessions
-GROUP BY month
-ORDER BY month;
+ACTIVITY_CHUNK_ROWS = 200_000
+
+days_sql = """
+SELECT DISTINCT day
+FROM daily_player_activity
+ORDER BY day;
+"""
+
+activity_sql = """
+SELECT day, player_id
+FROM daily_player_activity;
 """
 
-mau_df = pd.read_sql_query(mau_sql, conn)
+
+def load_activity(conn: sqlite3.Connection) -> pd.DataFrame:
+    """Return all (day, player_id) pairs with `day` as an ordered categorical."""
+    day_dtype = pd.CategoricalDtype(read_records(conn, days_sql)["day"], ordered=True)
+    return pd.concat(
+        (
+            chunk.astype({"day": day_dtype, "player_id": player_id_dtype})
+            for chunk in pd.read_sql_query(activity_sql, conn, chunksize=ACTIVITY_CHUNK_ROWS)
+        ),
+        ignore_index=True,
+    )
+
 
 # -----------------------------
 #    Revenue per day (EUR)
@@ -56,91 +185,216 @@ mau_df = pd.read_sql_query(mau_sql, conn)
 rev_sql = """
 SELECT
     substr(purchase_time_utc, 1, 10) AS day,          -- YYYY-MM-DD
-    SUM(price_eur) / 100.0 AS revenue_eur             -- cents -> euros
+    SUM(price_eur) AS revenue_cents                   -- integer sum, converted below
 FROM purchases
 GROUP BY day
 ORDER BY day;
 """
 
-rev_df = pd.read_sql_query(rev_sql, conn)
+# -----------------------------
+#    A/B retention cohort inputs: experiment assignments and first days
+# -----------------------------
+assignments_sql = """
+SELECT
+    experiment_name,
+    variant,
+    player_id
+FROM experiment_assignments;
+"""
+
+first_session_sql = """
+SELECT
+    player_id,
+    first_day
+FROM first_session;
+"""
+
+# -----------------------------
+#    Run the independent reads in parallel
+#
+#    Wall-clock becomes ~max(query times) instead of their sum; the
+#    activity load is the long pole.
+# -----------------------------
+with ThreadPoolExecutor(max_workers=4) as pool:
+    dp_future = pool.submit(run_read_only, load_activity)
+    rev_future = pool.submit(
+        run_read_only,
+        partial(read_records, sql=rev_sql, dtypes={"revenue_cents": "int64"}),
+    )
+    assignments_future = pool.submit(
+        run_read_only,
+        partial(read_records, sql=assignments_sql, dtypes={"player_id": player_id_dtype}),
+    )
+    first_session_future = pool.submit(
+        run_read_only,
+        partial(read_records, sql=first_session_sql, dtypes={"player_id": player_id_dtype}),
+    )
+
+dp = dp_future.result()
+rev_df = rev_future.result()
+# cents -> euros: one vectorized divide per day instead of per-row FP in SQLite
+rev_df["revenue_eur"] = rev_df.pop("revenue_cents") / 100
+assignments_df = assignments_future.result()
+first_session_df = first_session_future.result()
+
+# -----------------------------
+#    DAU per day
+# -----------------------------
+# `day` is categorical: group on its observed values only (all of them,
+# since the categories come from the same table) and say so explicitly.
+dau_df = dp.groupby("day", observed=True).size().reset_index(name="dau")
+
+# -----------------------------
+#    WAU per calendar week (YYYY-WW)
+#    WAU = unique players per week
+# -----------------------------
+# Same week numbering as SQLite's strftime('%Y-%W'); only the distinct
+# days are parsed, not every (day, player_id) row.
+week_of_day = {
+    day: datetime.strptime(day, "%Y-%m-%d").strftime("%Y-%W")   # e.g. 2025-03 (year-week)
+    for day in dau_df["day"]
+}
+wau_df = (
+    dp.groupby(dp["day"].map(week_of_day).rename("week"), observed=True)["player_id"]
+    .nunique()
+    .reset_index(name="wau")
+)
+
+# -----------------------------
+#    MAU per calendar month (YYYY-MM)
+#    MAU = unique players per month
+# -----------------------------
+mau_df = (
+    dp.groupby(dp["day"].str.slice(0, 7).rename("month"))["player_id"]   # YYYY-MM
+    .nunique()
+    .reset_index(name="mau")
+)
 
 # -----------------------------
 #   A/B test results: D1/D7/D30 retention per experiment & variant
 #
-# - first_session: first day player ever played
-# - activity: all (player_id, day) pairs
-# - exp_cohorts: players joined to experiments (experiment_name, variant)
+#   Computed in pandas from the (day, player_id) pairs already loaded
+#   above, so SQLite only has to hand over assignments and first days.
+#   Retention-function style: one pass over player-days builds a bitmask
+#   per player of the day offsets (day - first_day) they were active on,
+#   each horizon is then a single bit test.
+#
+# - offset: day - first_day for every activity row
+# - activity_mask: per player, bit N set <=> active on first_day + N
+#   (only the tracked offsets are kept, so a uint64 is plenty)
+# - cohorts: experiment assignments joined to first_session.first_day
+# - dayN_active: bit N of the cohort player's mask
 # - retention: cohort_size, day1/day7/day30 & ratios per cohort
 # -----------------------------
-ab_sql = """
-WITH first_session AS (
-    SELECT
-        player_id,
-        date(MIN(session_start_utc)) AS first_day
-    FROM sessions
-    GROUP BY player_id
-),
-activity AS (
-    SELECT
-        player_id,
-        date(session_start_utc) AS day
-    FROM sessions
-),
-exp_cohorts AS (
-    SELECT
-        ea.experiment_name,
-        ea.variant,
-        fs.player_id,
-        fs.first_day
-    FROM experiment_assignments ea
-    JOIN first_session fs
-      ON fs.player_id = ea.player_id
+RETENTION_DAYS = (1, 7, 30)   # bit positions, must stay < 64
+
+# Day number of each distinct active day; rows reference it through
+# their categorical code, so only these few strings are ever parsed.
+active_days = dp["day"].cat.categories
+day_number = pd.to_datetime(active_days).values.astype("datetime64[D]").astype(np.int64)
+
+# Every active player has a first_session row (same refresh), so player
+# positions in this index address all per-player arrays below.
+player_index = pd.Index(first_session_df["player_id"])
+first_day_number = day_number[active_days.get_indexer(first_session_df["first_day"])]
+
+act_pos = player_index.get_indexer(dp["player_id"])
+offset = day_number[dp["day"].cat.codes.to_numpy()] - first_day_number[act_pos]
+tracked = np.isin(offset, RETENTION_DAYS)
+
+activity_mask = np.zeros(len(player_index), dtype=np.uint64)
+np.bitwise_or.at(
+    activity_mask,
+    act_pos[tracked],
+    np.left_shift(np.uint64(1), offset[tracked].astype(np.uint64)),
 )
-SELECT
-    ec.experiment_name,
-    ec.variant,
-    ec.first_day AS cohort_first_day,
-    COUNT(*) AS cohort_size,
-    SUM(CASE WHEN a.day = date(ec.first_day, '+1 day') THEN 1 ELSE 0 END) AS day1_active,
-    SUM(CASE WHEN a.day = date(ec.first_day, '+7 day') THEN 1 ELSE 0 END) AS day7_active,
-    SUM(CASE WHEN a.day = date(ec.first_day, '+30 day') THEN 1 ELSE 0 END) AS day30_active,
-    CASE WHEN COUNT(*) > 0
-         THEN 1.0 * SUM(CASE WHEN a.day = date(ec.first_day, '+1 day') THEN 1 ELSE 0 END) / COUNT(*)
-         ELSE NULL
-    END AS d1_retention,
-    CASE WHEN COUNT(*) > 0
-         THEN 1.0 * SUM(CASE WHEN a.day = date(ec.first_day, '+7 day') THEN 1 ELSE 0 END) / COUNT(*)
-         ELSE NULL
-    END AS d7_retention,
-    CASE WHEN COUNT(*) > 0
-         THEN 1.0 * SUM(CASE WHEN a.day = date(ec.first_day, '+30 day') THEN 1 ELSE 0 END) / COUNT(*)
-         ELSE NULL
-    END AS d30_retention
-FROM exp_cohorts ec
-LEFT JOIN activity a
-  ON a.player_id = ec.player_id
-GROUP BY
-    ec.experiment_name,
-    ec.variant,
-    ec.first_day
-ORDER BY
-    ec.experiment_name,
-    ec.variant,
-    ec.first_day;
-"""
 
-ab_df = pd.read_sql_query(ab_sql, conn)
+cohorts = assignments_df.join(
+    first_session_df.set_index("player_id"), on="player_id", how="inner"
+)
+cohort_mask = activity_mask[player_index.get_indexer(cohorts["player_id"])]
 
-conn.close()
+for n in RETENTION_DAYS:
+    cohorts[f"day{n}_active"] = (cohort_mask >> np.uint64(n)) & np.uint64(1) == 1
+
+# Cohort sizes come from the one-row-per-player cohort frame; the hit
+# counts are aggregated separately, over retained players only, and
+# joined back on the cohort keys.
+cohort_keys = ["experiment_name", "variant", "first_day"]
+active_cols = [f"day{n}_active" for n in RETENTION_DAYS]
+
+cohort_sizes = cohorts.groupby(cohort_keys).size().rename("cohort_size")
+retained = cohorts[cohorts[active_cols].any(axis=1)]
+hits = retained.groupby(cohort_keys)[active_cols].sum()
+
+ab_df = (
+    cohort_sizes.to_frame()
+    .join(hits)
+    .fillna(0)
+    .astype({col: "int64" for col in active_cols})
+    .reset_index()
+    .rename(columns={"first_day": "cohort_first_day"})
+)
+for n in RETENTION_DAYS:
+    ab_df[f"d{n}_retention"] = ab_df[f"day{n}_active"] / ab_df["cohort_size"]
 
 # -----------------------------
 #  Write everything to a single excel file but to different sheets
+#
+#  Written with xlsxwriter directly, bypassing pandas' per-cell
+#  ExcelFormatter. constant_memory makes xlsxwriter flush each row to
+#  disk as soon as the next one starts instead of holding the whole
+#  workbook in memory; that only works for strictly row-by-row writes
+#  (write_column / DataFrame.to_excel would silently drop cells), so each
+#  column is converted to Python scalars once in bulk and the rows are
+#  zipped back together.
 # -----------------------------
-with pd.ExcelWriter(OUTPUT_XLSX, engine="xlsxwriter") as writer:
-    dau_df.to_excel(writer, sheet_name="DAU_daily", index=False)
-    wau_df.to_excel(writer, sheet_name="WAU_weekly", index=False)
-    mau_df.to_excel(writer, sheet_name="MAU_monthly", index=False)
-    rev_df.to_excel(writer, sheet_name="Revenue_daily", index=False)
-    ab_df.to_excel(writer, sheet_name="AB_retention", index=False)
+def write_sheet(book: xlsxwriter.Workbook, sheet_name: str, df: pd.DataFrame, header_format) -> None:
+    """Write df (header + rows, no index) to a new sheet in row order."""
+    ws = book.add_worksheet(sheet_name)
+    ws.write_row(0, 0, df.columns, header_format)
+    columns = [df[col].tolist() for col in df.columns]
+    for row_idx, row in enumerate(zip(*columns), start=1):
+        ws.write_row(row_idx, 0, row)
+
+
+kpi_tables = {
+    "DAU_daily": dau_df,
+    "WAU_weekly": wau_df,
+    "MAU_monthly": mau_df,
+    "Revenue_daily": rev_df,
+    "AB_retention": ab_df,
+}
+
+# KPI strings are plain data (days, weeks, variant names): skip
+# xlsxwriter's per-cell "=formula" / URL regex checks on every string.
+workbook_options = {
+    "constant_memory": True,
+    "strings_to_formulas": False,
+    "strings_to_urls": False,
+}
+
+with xlsxwriter.Workbook(OUTPUT_XLSX, workbook_options) as book:
+    # Same look as pandas' default header row
+    header_format = book.add_format(
+        {"bold": True, "border": 1, "align": "center", "valign": "top"}
+    )
+    for sheet_name, df in kpi_tables.items():
+        write_sheet(book, sheet_name, df, header_format)
 
 print(f"KPI Excel generated: {OUTPUT_XLSX}")
+
+# -----------------------------
+#  Optional: same tables as zstd-compressed Parquet files
+# -----------------------------
+if OUTPUT_PARQUET_DIR is not None:
+    parquet_dir = Path(OUTPUT_PARQUET_DIR)
+    parquet_dir.mkdir(parents=True, exist_ok=True)
+    for name, df in kpi_tables.items():
+        df.to_parquet(
+            parquet_dir / f"{name}.parquet",
+            engine="pyarrow",
+            compression="zstd",
+            index=False,
+        )
+    print(f"KPI Parquet files generated in: {parquet_dir}")
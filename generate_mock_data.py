@@ -24,13 +24,16 @@ If you need a bigger or smaller dataset, tweak the knobs in the
 "Global config / knobs" section.
 """
 
+import itertools
 import math
-import random
+import re
 import sqlite3
 import json
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import List, Dict, Tuple, Optional
+from typing import List, Dict, Sequence, Tuple
+
+import numpy as np
 
 # ---------------------------------------
 # Global config / knobs
@@ -66,100 +69,272 @@ RANDOM_SEED = 131287
 # Utility functions
 # ---------------------------------------
 
-def daterange(start: datetime, days: int) -> List[datetime]:
-    """Return a list of day-start datetime objects from start for `days` days."""
-    return [start + timedelta(days=i) for i in range(days)]
+# Timestamps are simulated as integer seconds since START_DATE and only
+# turned into ISO8601 strings when rows are built. The time-of-day part
+# comes from a table of all 86 400 "HH:MM:SSZ" suffixes and the date part
+# is formatted once per day, so no datetime objects are created per row.
+SECONDS_PER_DAY = 86_400
+_HMS_SUFFIXES = np.array(
+    [f"{h:02d}:{m:02d}:{sec:02d}Z" for h in range(24) for m in range(60) for sec in range(60)],
+    dtype=object,
+)
+_DAY_PREFIXES: Dict[int, str] = {}
+
+
+def _day_prefix(day: int) -> str:
+    """'YYYY-MM-DDT' for a day index, formatted once per day and cached."""
+    prefix = _DAY_PREFIXES.get(day)
+    if prefix is None:
+        prefix = (START_DATE + timedelta(days=day)).strftime("%Y-%m-%dT")
+        _DAY_PREFIXES[day] = prefix
+    return prefix
 
 
-def choose_weighted(choices: List[Tuple[object, float]]) -> object:
+def iso_utc(seconds: int) -> str:
+    """Format seconds since START_DATE as an ISO8601 UTC string ('...T18:30:00Z')."""
+    day, sec_of_day = divmod(seconds, SECONDS_PER_DAY)
+    return _day_prefix(day) + _HMS_SUFFIXES[sec_of_day]
+
+
+def iso_utc_many(seconds: np.ndarray) -> List[str]:
     """
-    Randomly choose one element from a list of (value, weight) pairs.
-    We assume weights are non-negative. If all weights are zero, choose uniformly.
+    iso_utc for a whole array of seconds. The string concatenation runs as
+    one object-array add instead of one Python call per timestamp.
     """
-    total = sum(w for _, w in choices)
-    if total <= 0:
-        # all weights zero -> fallback to uniform
-        return random.choice([v for v, _ in choices])
-    r = random.random() * total
-    upto = 0.0
-    for value, weight in choices:
-        upto += weight
-        if r <= upto:
-            return value
-    # Fallback
-    return choices[-1][0]
-
-
-def normal_clamp(mu: float, sigma: float, lo: float, hi: float) -> float:
-    """Draw from N(mu, sigma^2) and clamp to [lo, hi]."""
-    x = random.gauss(mu, sigma)
-    return max(lo, min(hi, x))
-
-
-def pick_country_and_tz() -> Tuple[str, int]:
+    if not len(seconds):
+        return []
+    day, sec_of_day = np.divmod(seconds, SECONDS_PER_DAY)
+    first_day = int(day.min())
+    prefixes = np.array(
+        [_day_prefix(d) for d in range(first_day, int(day.max()) + 1)], dtype=object
+    )
+    return (prefixes[day - first_day] + _HMS_SUFFIXES[sec_of_day]).tolist()
+
+
+# Country + timezone buckets and their relative weights. We overweight
+# US/NA and Western Europe slightly, and add a bucket for "OTHER" so that
+# the dataset is not too Euro/US centric but still has a clear majority.
+COUNTRY_TZ_CHOICES: List[Tuple[str, int]] = [
+    ("US", -5),
+    ("US", -8),
+    ("CA", -5),
+    ("GB", 0),
+    ("DE", 1),
+    ("FR", 1),
+    ("BR", -3),
+    ("IN", 5),
+    ("JP", 9),
+    ("KR", 9),
+    ("OTHER", 0),
+]
+COUNTRY_TZ_WEIGHTS = [0.12, 0.08, 0.04, 0.08, 0.06, 0.06, 0.08, 0.08, 0.08, 0.08, 0.24]
+assert len(COUNTRY_TZ_CHOICES) == len(COUNTRY_TZ_WEIGHTS)
+
+
+def probabilities(weights: List[float]) -> np.ndarray:
+    """Normalise non-negative weights into a probability vector for rng.choice."""
+    p = np.asarray(weights, dtype=np.float64)
+    return p / p.sum()
+
+
+class AliasSampler:
+    """Draw from a fixed discrete distribution with Walker's alias method.
+
+    The alias table is built once (O(k) for k categories); every draw is then
+    one uniform index plus one comparison, regardless of k. Used for the
+    categorical draws in the hot generation loop, which are sampled in
+    batches of a whole day at a time.
     """
-    Rough-and-ready country + timezone selection.
+    __slots__ = ("values", "prob", "alias")
+
+    def __init__(self, values: Sequence[object], weights: List[float]):
+        assert len(values) == len(weights)
+        k = len(weights)
+        scaled = probabilities(weights) * k
+        prob = np.ones(k)
+        alias = np.arange(k)
+        small = [i for i in range(k) if scaled[i] < 1.0]
+        large = [i for i in range(k) if scaled[i] >= 1.0]
+        while small and large:
+            s, g = small.pop(), large.pop()
+            prob[s] = scaled[s]
+            alias[s] = g
+            scaled[g] -= 1.0 - scaled[s]
+            (small if scaled[g] < 1.0 else large).append(g)
+        # Whatever is left over is (up to rounding) exactly 1.0 and keeps
+        # prob = 1, i.e. never takes its alias.
+        self.values = np.asarray(values)
+        self.prob = prob
+        self.alias = alias
+
+    def sample(self, rng: np.random.Generator, n: int) -> np.ndarray:
+        """Return `n` independent draws as an array of values."""
+        i = rng.integers(0, len(self.prob), n)
+        take_alias = rng.random(n) >= self.prob[i]
+        return self.values[np.where(take_alias, self.alias[i], i)]
+
+
+# Categorical attributes are held as small integer codes that index into
+# these tables; the strings are only looked up when rows are written to
+# the database (the schema keeps them as readable TEXT).
+PLATFORMS = ["Android", "iOS"]
+ENGAGEMENT_SEGMENTS = ["casual", "midcore", "heavy"]
+CASUAL, MIDCORE, HEAVY = range(len(ENGAGEMENT_SEGMENTS))
+SPEND_SEGMENTS = ["nonpayer", "minnow", "dolphin", "whale"]
+NONPAYER, MINNOW, DOLPHIN, WHALE = range(len(SPEND_SEGMENTS))
+ENTRY_POINTS = ["icon_tap", "push", "reengagement_ad"]
+GAME_MODES = ["solo", "duo", "team"]
+MATCH_OUTCOMES = ["win", "loss", "draw"]
+WIN, LOSS, DRAW = range(len(MATCH_OUTCOMES))
+
+
+def lookup_table(names: List[str]) -> np.ndarray:
+    """Object array of `names`, so that names[codes] gathers shared str objects."""
+    return np.array(names, dtype=object)
+
+
+# events.metadata_json payloads; constant, so encoded once here
+MATCH_STARTED_METADATA = json.dumps({"note": "match_started"})
+MATCH_ENDED_METADATA = json.dumps({"note": "match_ended"})
+
+# Very simple IAP product catalogue as a structured array, so that all
+# fields of the purchased products are one gather: PRODUCTS[product_idx].
+# Prices are stored in EUR cents, like purchases.price_eur.
+PRODUCTS = np.array(
+    [
+        ("prod_soft_small", "SoftPack", 199, 500, 0),
+        ("prod_soft_large", "SoftPack", 999, 3000, 0),
+        ("prod_hard_small", "HardPack", 499, 0, 50),
+        ("prod_hard_large", "HardPack", 1999, 0, 300),
+        ("prod_bundle", "Bundle", 999, 2500, 50),
+    ],
+    dtype=[
+        ("product_id", object),
+        ("product_type", object),
+        ("price_cents", np.int64),
+        ("soft_grant", np.int64),
+        ("hard_grant", np.int64),
+    ],
+)
+
+# Session length: lognormal with a median of ~10 min, at least one minute
+LOG_MEDIAN_SESSION_SEC = math.log(600.0)
+SESSION_SEC_SIGMA = 0.7
+MIN_SESSION_SEC = 60
+
+# Soft currency earned per match, indexed by outcome code (inclusive range)
+SOFT_DELTA_LOW = np.array([15, 5, 5])     # WIN, LOSS, DRAW
+SOFT_DELTA_HIGH = np.array([40, 20, 25])
+
+# Per-session, per-match and per-purchase categorical distributions
+CASUAL_SESSIONS_SAMPLER = AliasSampler([1, 2, 3], [0.6, 0.3, 0.1])
+MIDCORE_SESSIONS_SAMPLER = AliasSampler([1, 2, 3, 4], [0.2, 0.4, 0.3, 0.1])
+SESSION_HOUR_SAMPLER = AliasSampler([12, 15, 18, 20, 22], [0.1, 0.2, 0.4, 0.2, 0.1])
+ENTRY_POINT_SAMPLER = AliasSampler(range(len(ENTRY_POINTS)), [1, 1, 1])
+MATCHES_PER_SESSION_SAMPLER = AliasSampler([0, 1, 2, 3, 4], [0.1, 0.4, 0.3, 0.15, 0.05])
+GAME_MODE_SAMPLER = AliasSampler(range(len(GAME_MODES)), [0.5, 0.2, 0.3])
+MATCH_OUTCOME_SAMPLER = AliasSampler([WIN, LOSS, DRAW], [0.45, 0.45, 0.10])
+PRODUCT_SAMPLER = AliasSampler(range(len(PRODUCTS)), [0.3, 0.2, 0.2, 0.1, 0.2])
+
+
+def cumsum_within_groups(values: np.ndarray, group_sizes: np.ndarray) -> np.ndarray:
+    """
+    Exclusive running sum of `values` that restarts at every group.
 
-    We overweight US/NA and Western Europe slightly, and add a bucket for "OTHER"
-    so that the dataset is not too Euro/US centric but still has a clear majority.
+    `values` is laid out as consecutive groups of `group_sizes` elements
+    (zero-sized groups allowed); each element gets the sum of the elements
+    before it in its own group.
     """
-    choices = [
-        ("US", -5),
-        ("US", -8),
-        ("CA", -5),
-        ("GB", 0),
-        ("DE", 1),
-        ("FR", 1),
-        ("BR", -3),
-        ("IN", 5),
-        ("JP", 9),
-        ("KR", 9),
-        ("OTHER", 0),
-    ]
-    weights = [0.12, 0.08, 0.04, 0.08, 0.06, 0.06, 0.08, 0.08, 0.08, 0.08, 0.24]
-    assert len(choices) == len(weights)
-    total = sum(weights)
-    r = random.random() * total
-    upto = 0.0
-    for (cc, tz), w in zip(choices, weights):
-        upto += w
-        if r <= upto:
-            return cc, tz
-    return choices[-1]
+    running = np.cumsum(values) - values
+    group_start = np.cumsum(group_sizes) - group_sizes
+    return running - running[np.repeat(group_start, group_sizes)]
 
 
 # ---------------------------------------
 # DB init
 # ---------------------------------------
 
-def init_db(conn: sqlite3.Connection, schema_path: Path) -> None:
-    """Create all tables and indexes from schema.sql."""
+def split_schema(sql: str) -> Tuple[List[str], List[str]]:
+    """
+    Split a schema script into (table statements, CREATE INDEX statements).
+
+    Statements are delimited with sqlite3.complete_statement, so semicolons
+    inside comments or string literals do not break the split.
+    """
+    tables: List[str] = []
+    indexes: List[str] = []
+    statement = ""
+    for line in sql.splitlines(keepends=True):
+        statement += line
+        if not sqlite3.complete_statement(statement):
+            continue
+        # Classify on the statement text without its comment lines
+        body = "\n".join(
+            l for l in statement.splitlines() if not l.lstrip().startswith("--")
+        ).strip()
+        if re.match(r"CREATE\s+(UNIQUE\s+)?INDEX\b", body, re.IGNORECASE):
+            indexes.append(statement)
+        else:
+            tables.append(statement)
+        statement = ""
+    return tables, indexes
+
+
+def init_db(conn: sqlite3.Connection, schema_path: Path) -> List[str]:
+    """
+    Create all tables from schema.sql and return its CREATE INDEX statements.
+
+    Indexes are built by create_indexes() after the bulk load: building an
+    index once over the finished table is much cheaper than maintaining
+    every index on every inserted row. For the same reason foreign keys are
+    not enforced per row during the load but verified once at the end,
+    before the load is committed (check_foreign_keys()).
+    """
     with schema_path.open("r", encoding="utf-8") as f:
         sql = f.read()
-    conn.executescript(sql)
-    # Make sure foreign keys are enforced
-    conn.execute("PRAGMA foreign_keys = ON;")
+    tables, indexes = split_schema(sql)
+    conn.executescript("".join(tables))
+    conn.execute("PRAGMA foreign_keys = OFF;")
+    return indexes
+
+
+def create_indexes(conn: sqlite3.Connection, indexes: List[str]) -> None:
+    """Run the CREATE INDEX statements deferred by init_db()."""
+    for statement in indexes:
+        conn.execute(statement)
+
+
+def check_foreign_keys(conn: sqlite3.Connection) -> None:
+    """
+    Verify every foreign key in the loaded database; raise RuntimeError on
+    violations. Works inside the open load transaction.
+    """
+    violations = conn.execute("PRAGMA foreign_key_check;").fetchall()
+    if violations:
+        raise RuntimeError(
+            f"{len(violations)} foreign key violations, e.g. {violations[:5]}"
+        )
 
 
 # ---------------------------------------
 # Data model in memory (for generation)
 # ---------------------------------------
 
-class PlayerMeta:
-    """Lightweight in-memory representation of a player for simulation.
+class Players:
+    """Column-oriented (struct-of-arrays) player table for simulation.
 
-    This is intentionally kept very small (via __slots__) so that we can
-    keep tens of thousands of players in memory without allocating large
-    Python dicts for each.
+    Each attribute is one NumPy array indexed by player position
+    (player_id - 1), so filters such as "who has not churned yet" are a
+    single vector comparison instead of a loop over Python objects.
     """
     __slots__ = (
         "player_id",
-        "created_at",
-        "country_code",
-        "platform",
-        "time_zone_offset",
-        "engagement_segment",
-        "spend_segment",
+        "created_day_idx",  # 0-based day index on which the account was created
+        "country_idx",  # index into COUNTRY_TZ_CHOICES
+        "platform",  # index into PLATFORMS
+        "time_zone_offset",  # hours
+        "engagement_segment",  # CASUAL / MIDCORE / HEAVY
+        "spend_segment",  # NONPAYER / MINNOW / DOLPHIN / WHALE
         "level",
         "total_spend_eur",
         "churn_day_idx",  # last day index on which this player can be active
@@ -167,35 +342,44 @@ class PlayerMeta:
 
     def __init__(
         self,
-        player_id: int,
-        created_at: datetime,
-        country_code: str,
-        platform: str,
-        time_zone_offset: int,
-        engagement_segment: str,
-        spend_segment: str,
-        churn_day_idx: int,
+        created_day_idx: np.ndarray,
+        country_idx: np.ndarray,
+        platform: np.ndarray,
+        engagement_segment: np.ndarray,
+        spend_segment: np.ndarray,
+        churn_day_idx: np.ndarray,
     ):
-        self.player_id = player_id
-        self.created_at = created_at
-        self.country_code = country_code
-        self.platform = platform
-        self.time_zone_offset = time_zone_offset  # hours
-        self.engagement_segment = engagement_segment  # 'casual', 'midcore', 'heavy'
-        self.spend_segment = spend_segment  # 'nonpayer', 'minnow', 'dolphin', 'whale'
-        self.level = 1
-        self.total_spend_eur = 0.0
+        n = len(created_day_idx)
+        self.player_id = np.arange(1, n + 1, dtype=np.int64)
+        self.created_day_idx = created_day_idx.astype(np.int16)
+        self.country_idx = country_idx.astype(np.int8)
+        self.platform = platform.astype(np.int8)
+        self.time_zone_offset = np.array(
+            [tz for _, tz in COUNTRY_TZ_CHOICES], dtype=np.int8
+        )[self.country_idx]
+        self.engagement_segment = engagement_segment.astype(np.int8)
+        self.spend_segment = spend_segment.astype(np.int8)
+        self.level = np.ones(n, dtype=np.int32)
+        self.total_spend_eur = np.zeros(n, dtype=np.float32)
         # Index of the last simulated day (0-based) on which this player
         # can still appear as active. After this they are treated as fully
         # churned and removed from the active pool.
-        self.churn_day_idx = churn_day_idx
+        self.churn_day_idx = churn_day_idx.astype(np.int16)
+
+    def __len__(self) -> int:
+        return len(self.player_id)
+
+
+def day_timestamps(num_days: int) -> List[str]:
+    """ISO8601 UTC strings for midnight of each day index starting at START_DATE."""
+    return [iso_utc(d * SECONDS_PER_DAY) for d in range(num_days)]
 
 
 # ---------------------------------------
 # DAU curve with seasonality + patches
 # ---------------------------------------
 
-def generate_dau_curve(num_days: int) -> List[int]:
+def generate_dau_curve(num_days: int, rng: np.random.Generator) -> List[int]:
     """
     Build a daily DAU curve with a more realistic "new game" shape:
 
@@ -208,7 +392,7 @@ def generate_dau_curve(num_days: int) -> List[int]:
     The function returns absolute DAU targets (clamped to [0, MAX_DAU])
     for each simulated day.
     """
-    rel: List[float] = []
+    t = np.arange(num_days, dtype=np.float64)
 
     # Characteristic time scale for the early post-launch decay.
     # Roughly "how many days until the curve has dropped most of the way
@@ -223,52 +407,45 @@ def generate_dau_curve(num_days: int) -> List[int]:
     # Extra height of the launch spike above the long-term floor.
     launch_spike_height = 0.8  # gives 1.4 at t=0 (0.6 + 0.8)
 
-    for t in range(num_days):
-        # --- Base post-launch decay ---
-        # At t=0: base ≈ long_term_floor + launch_spike_height
-        # As t → ∞: base → long_term_floor
-        base = long_term_floor + launch_spike_height * math.exp(-t / tau_fast)
-
-        # --- Seasonal factor (mapped from "day-of-year" idea) ---
-        day_of_year = int(t * (365.0 / max(1, num_days)))
-        season_mult = 1.0
-        # Rough summer window: 150–240 (lower activity)
-        if 150 <= day_of_year <= 240:
-            season_mult *= 0.8  # -20 %
-        # Christmas period: 330–364 (higher activity)
-        if 330 <= day_of_year <= 364:
-            season_mult *= 1.3  # +30 %
-
-        # --- Patch spikes every ~60 days ---
-        patch_mult = 1.0
-        for pd in PATCH_DAYS:
-            if pd < 0 or pd >= num_days:
-                continue
-            dist = abs(t - pd)
-            if dist == 0:
-                patch_mult *= 1.4
-            elif dist == 1:
-                patch_mult *= 1.2
-            elif dist == 2:
-                patch_mult *= 1.1
-
-        # Small multiplicative noise so the curve is not perfectly smooth
-        noise = random.uniform(0.95, 1.05)
-
-        rel.append(base * season_mult * patch_mult * noise)
+    # --- Base post-launch decay ---
+    # At t=0: base ≈ long_term_floor + launch_spike_height
+    # As t → ∞: base → long_term_floor
+    base = long_term_floor + launch_spike_height * np.exp(-t / tau_fast)
+
+    # --- Seasonal factor (mapped from "day-of-year" idea) ---
+    day_of_year = (t * (365.0 / max(1, num_days))).astype(np.int64)
+    season_mult = np.ones(num_days)
+    # Rough summer window: 150–240 (lower activity)
+    season_mult[(day_of_year >= 150) & (day_of_year <= 240)] *= 0.8  # -20 %
+    # Christmas period: 330–364 (higher activity)
+    season_mult[(day_of_year >= 330) & (day_of_year <= 364)] *= 1.3  # +30 %
+
+    # --- Patch spikes every ~60 days ---
+    patch_mult = np.ones(num_days)
+    for pd in PATCH_DAYS:
+        if pd < 0 or pd >= num_days:
+            continue
+        for dist, mult in ((0, 1.4), (1, 1.2), (2, 1.1)):
+            for day in {pd - dist, pd + dist}:
+                if 0 <= day < num_days:
+                    patch_mult[day] *= mult
+
+    # Small multiplicative noise so the curve is not perfectly smooth
+    noise = rng.uniform(0.95, 1.05, num_days)
+
+    rel = base * season_mult * patch_mult * noise
 
     # Normalise so the maximum relative value becomes 1.0,
     # then scale to the configured MAX_DAU.
-    max_rel = max(rel)
-    scaled = [int(round(MAX_DAU * (x / max_rel))) for x in rel]
-    return scaled
+    scaled = np.rint(MAX_DAU * (rel / rel.max())).astype(np.int64)
+    return scaled.tolist()
 
 
 # ---------------------------------------
 # Player generation
 # ---------------------------------------
 
-def generate_players(num_players: int) -> List[PlayerMeta]:
+def generate_players(num_players: int, rng: np.random.Generator) -> Players:
     """
     Generate players with:
     - creation date spread across the simulated period
@@ -280,87 +457,79 @@ def generate_players(num_players: int) -> List[PlayerMeta]:
     The churn model is important for realistic WAU/MAU behaviour:
     most players drop out within a few weeks, while a minority of
     "core" users stay active for the whole window.
+
+    Every attribute is drawn for all players at once as a NumPy column.
     """
-    players: List[PlayerMeta] = []
-
-    for pid in range(1, num_players + 1):
-        # Creation date: heavily front-loaded around launch, with a tail.
-        #
-        # We don't want players to appear uniformly across the whole window,
-        # otherwise early DAU will ramp up simply because there are not yet
-        # enough accounts created.
-        u = random.random()
-        if u < 0.60:
+    n = num_players
+
+    # Creation date: heavily front-loaded around launch, with a tail.
+    #
+    # We don't want players to appear uniformly across the whole window,
+    # otherwise early DAU will ramp up simply because there are not yet
+    # enough accounts created.
+    u = rng.random(n)
+    offset_days = np.select(
+        [u < 0.60, u < 0.85, u < 0.95],
+        [
             # ~60% of players arrive in the first 4 days (huge launch spike)
-            offset_days = random.randint(0, 3)
-        elif u < 0.85:
+            rng.integers(0, 3, n, endpoint=True),
             # ~25% arrive over the next month
-            offset_days = random.randint(4, min(30, NUM_DAYS - 1))
-        elif u < 0.95:
+            rng.integers(4, min(30, NUM_DAYS - 1), n, endpoint=True),
             # ~10% arrive over the following 2 months
-            offset_days = random.randint(31, min(90, NUM_DAYS - 1))
-        else:
-            # ~5% trickle in over the rest of the period
-            offset_days = random.randint(91, NUM_DAYS - 1)
-
-        offset_days = max(0, min(offset_days, NUM_DAYS - 1))
-
-        created_at = START_DATE + timedelta(days=offset_days)
-        birth_day_idx = offset_days  # 0-based index
-
-        country, tz = pick_country_and_tz()
-        platform = random.choices(["Android", "iOS"], weights=[0.6, 0.4])[0]
-
-        # Engagement segments: mostly casual, some midcore, few heavy.
-        engagement_segment = random.choices(
-            ["casual", "midcore", "heavy"],
-            weights=[0.7, 0.2, 0.1],
-        )[0]
-
-        # Spend segments:
-        # approx: whales 0.2%, dolphins 1.8%, minnows 8%, rest non-payer
-        r = random.random()
-        if r < 0.002:
-            spend_segment = "whale"
-        elif r < 0.002 + 0.018:
-            spend_segment = "dolphin"
-        elif r < 0.002 + 0.018 + 0.08:
-            spend_segment = "minnow"
-        else:
-            spend_segment = "nonpayer"
-
-        # --- Simple lifetime / churn model ---
-        # A small fraction of players are long-lived and effectively
-        # never churn within the simulated window. Everyone else has an
-        # exponential-like lifetime in days.
-        if random.random() < 0.15:
-            # ~15% "core" users: active until the end of the window.
-            churn_day_idx = NUM_DAYS - 1
-        else:
-            # Others: geometric / exponential style lifetime
-            mean_lifetime_days = 45.0
-            extra_life = max(1, int(random.expovariate(1.0 / mean_lifetime_days)))
-            churn_day_idx = min(NUM_DAYS - 1, birth_day_idx + extra_life)
-
-        p = PlayerMeta(
-            player_id=pid,
-            created_at=created_at,
-            country_code=country,
-            platform=platform,
-            time_zone_offset=tz,
-            engagement_segment=engagement_segment,
-            spend_segment=spend_segment,
-            churn_day_idx=churn_day_idx,
-        )
-        players.append(p)
+            rng.integers(31, min(90, NUM_DAYS - 1), n, endpoint=True),
+        ],
+        # ~5% trickle in over the rest of the period
+        rng.integers(91, NUM_DAYS - 1, n, endpoint=True),
+    )
+    offset_days = np.clip(offset_days, 0, NUM_DAYS - 1)
+    birth_day_idx = offset_days  # 0-based index
+
+    country_tz_idx = rng.choice(
+        len(COUNTRY_TZ_CHOICES), size=n, p=probabilities(COUNTRY_TZ_WEIGHTS)
+    )
+    platforms = rng.choice(len(PLATFORMS), size=n, p=[0.6, 0.4])
+
+    # Engagement segments: mostly casual, some midcore, few heavy.
+    engagement_segments = rng.choice(
+        [CASUAL, MIDCORE, HEAVY], size=n, p=[0.7, 0.2, 0.1]
+    )
+
+    # Spend segments:
+    # approx: whales 0.2%, dolphins 1.8%, minnows 8%, rest non-payer
+    spend_segments = np.array([WHALE, DOLPHIN, MINNOW, NONPAYER])[
+        np.searchsorted([0.002, 0.002 + 0.018, 0.002 + 0.018 + 0.08], rng.random(n))
+    ]
+
+    # --- Simple lifetime / churn model ---
+    # A small fraction of players are long-lived and effectively
+    # never churn within the simulated window. Everyone else has an
+    # exponential-like lifetime in days.
+    mean_lifetime_days = 45.0
+    extra_life = np.maximum(1, rng.exponential(mean_lifetime_days, n).astype(np.int64))
+    churn_day_idx = np.where(
+        rng.random(n) < 0.15,
+        # ~15% "core" users: active until the end of the window.
+        NUM_DAYS - 1,
+        # Others: geometric / exponential style lifetime
+        np.minimum(NUM_DAYS - 1, birth_day_idx + extra_life),
+    )
 
-    return players
+    return Players(
+        created_day_idx=birth_day_idx,
+        country_idx=country_tz_idx,
+        platform=platforms,
+        engagement_segment=engagement_segments,
+        spend_segment=spend_segments,
+        churn_day_idx=churn_day_idx,
+    )
 
 
-def insert_players(conn: sqlite3.Connection, players: List[PlayerMeta]) -> None:
+def insert_players(
+    conn: sqlite3.Connection, players: Players, rng: np.random.Generator
+) -> None:
     """
     Insert players into the players table.
-    Only uses fields available in the schema; enrichment lives in PlayerMeta.
+    Only uses fields available in the schema; enrichment lives in Players.
     """
     sql = """
         INSERT INTO players (
@@ -374,28 +543,34 @@ def insert_players(conn: sqlite3.Connection, players: List[PlayerMeta]) -> None:
     channels = ["Organic", "AdsNetworkA", "AdsNetworkB", "CrossPromo"]
     campaigns = ["", "Launch2025", "SummerEvent", "HolidayPush"]
 
-    rows = []
-    for p in players:
-        channel = random.choices(channels, weights=[0.5, 0.2, 0.2, 0.1])[0]
-        if channel == "Organic":
-            campaign = ""
-        else:
-            campaign = random.choice(campaigns)
-        lang = "en" if p.country_code in {"US", "GB", "CA"} else "en"
-        rows.append((
-            p.player_id,
-            p.created_at.isoformat(timespec="seconds") + "Z",
-            p.country_code,
-            p.platform,
-            f"{p.platform}_Device_{random.randint(1, 5)}",
-            f"{random.randint(12, 16)}.0",
-            channel,
-            campaign,
-            lang,
-            f"UTC{p.time_zone_offset:+d}",
-        ))
-    conn.executemany(sql, rows)
-    conn.commit()
+    day_stamps = day_timestamps(NUM_DAYS)
+
+    n = len(players)
+    channel_idx = rng.choice(len(channels), size=n, p=[0.5, 0.2, 0.2, 0.1])
+    campaign_idx = rng.integers(0, len(campaigns), n)
+    device_idx = rng.integers(1, 5, n, endpoint=True)
+    os_major = rng.integers(12, 16, n, endpoint=True)
+
+    # Organic installs have no campaign
+    campaign_names = np.where(
+        channel_idx == channels.index("Organic"), "", lookup_table(campaigns)[campaign_idx]
+    )
+    platform_names = lookup_table(PLATFORMS)[players.platform]
+
+    conn.executemany(sql, zip(
+        players.player_id.tolist(),
+        map(day_stamps.__getitem__, players.created_day_idx.tolist()),
+        lookup_table([cc for cc, _ in COUNTRY_TZ_CHOICES])[players.country_idx].tolist(),
+        platform_names.tolist(),
+        (f"{platform}_Device_{device}" for platform, device in zip(
+            platform_names.tolist(), device_idx.tolist()
+        )),
+        (f"{v}.0" for v in os_major.tolist()),
+        lookup_table(channels)[channel_idx].tolist(),
+        campaign_names.tolist(),
+        ["en"] * n,  # language_code: every market is English for now
+        lookup_table([f"UTC{tz:+d}" for _, tz in COUNTRY_TZ_CHOICES])[players.country_idx].tolist(),
+    ))
 
 
 # ---------------------------------------
@@ -404,7 +579,8 @@ def insert_players(conn: sqlite3.Connection, players: List[PlayerMeta]) -> None:
 
 def generate_teams_and_memberships(
     conn: sqlite3.Connection,
-    players: List[PlayerMeta],
+    players: Players,
+    rng: np.random.Generator,
 ) -> None:
     """
     Generate teams with a tri-modal size distribution:
@@ -412,68 +588,50 @@ def generate_teams_and_memberships(
     - 25-player mid-sized teams
     - 45-player large teams (slightly below the max guild size)
     """
-    # We first decide how many teams we need to roughly cover players,
-    # then assign players into teams while respecting the desired size
-    # distribution.
-    team_rows = []
-    membership_rows = []
-
-    next_team_id = 1
-    next_membership_id = 1
-
-    shuffled_players = players[:]
-    random.shuffle(shuffled_players)
-
-    i = 0
-    while i < len(shuffled_players):
-        # Decide team size bucket
-        size_bucket = random.choices(
-            ["small", "medium", "large"],
-            weights=[0.7, 0.2, 0.1],
-        )[0]
-        if size_bucket == "small":
-            max_members = random.randint(1, 5)
-            tier_level = 0
-        elif size_bucket == "medium":
-            max_members = 25
-            tier_level = 1
-        else:
-            # Large tier ~45, representing 45–50 guilds where
-            # churn/filling causes a concentration at ~45.
-            max_members = 45
-            tier_level = 2
-
-        if i >= len(shuffled_players):
-            break
-        remaining = len(shuffled_players) - i
-        team_size = min(max_members, remaining)
-
-        created_at = START_DATE + timedelta(days=random.randint(0, NUM_DAYS - 1))
-
-        team_rows.append((
-            next_team_id,
-            created_at.isoformat(timespec="seconds") + "Z",
-            None,  # disbanded_at_utc
-            tier_level,
-            max_members,
-        ))
-
-        # Assign players to this team
-        for j in range(team_size):
-            p = shuffled_players[i + j]
-            joined_at = p.created_at + timedelta(days=random.randint(0, 60))
-            membership_rows.append((
-                next_membership_id,
-                p.player_id,
-                next_team_id,
-                joined_at.isoformat(timespec="seconds") + "Z",
-                None,  # left_at_utc
-                1 if j == 0 else 0,  # leader flag
-            ))
-            next_membership_id += 1
-
-        next_team_id += 1
-        i += team_size
+    # Teams are filled in order from a shuffled player list: each team
+    # takes up to its max_members players and the last one takes whatever
+    # is left over, so team boundaries fall out of a cumulative sum.
+    n = len(players)
+    shuffled_players = rng.permutation(n)
+
+    # Every team takes at least one player, so n draws per team attribute
+    # (and one join delay per player) are always enough.
+    size_buckets = rng.choice(3, size=n, p=[0.7, 0.2, 0.1])
+    small_team_sizes = rng.integers(1, 5, n, endpoint=True)
+    team_created_days = rng.integers(0, NUM_DAYS - 1, n, endpoint=True)
+    join_delays = rng.integers(0, 60, n, endpoint=True)
+
+    # Bucket 0: solo players or tiny groups; bucket 1: ~25; bucket 2: large
+    # tier ~45, representing 45–50 guilds where churn/filling causes a
+    # concentration at ~45.
+    max_members = np.choose(size_buckets, [small_team_sizes, 25, 45])
+    tier_level = size_buckets
+
+    filled = np.cumsum(max_members)
+    n_teams = int(np.searchsorted(filled, n, side="left")) + 1
+    team_size = max_members[:n_teams].copy()
+    team_size[-1] = n - (filled[n_teams - 2] if n_teams > 1 else 0)
+
+    team_ids = np.arange(1, n_teams + 1)
+    member_team = np.repeat(team_ids, team_size)
+    is_leader = cumsum_within_groups(np.ones(n, dtype=np.int64), team_size) == 0
+    joined_day = players.created_day_idx[shuffled_players].astype(np.int64) + join_delays
+
+    team_rows = zip(
+        team_ids.tolist(),
+        iso_utc_many(team_created_days[:n_teams] * SECONDS_PER_DAY),
+        itertools.repeat(None),  # disbanded_at_utc
+        tier_level[:n_teams].tolist(),
+        max_members[:n_teams].tolist(),
+    )
+    membership_rows = zip(
+        range(1, n + 1),
+        players.player_id[shuffled_players].tolist(),
+        member_team.tolist(),
+        iso_utc_many(joined_day * SECONDS_PER_DAY),
+        itertools.repeat(None),  # left_at_utc
+        is_leader.astype(np.int64).tolist(),
+    )
 
     conn.executemany(
         """
@@ -493,14 +651,15 @@ def generate_teams_and_memberships(
         """,
         membership_rows,
     )
-    conn.commit()
 
 
 # ---------------------------------------
 # Experiments
 # ---------------------------------------
 
-def generate_experiments(conn: sqlite3.Connection, players: List[PlayerMeta]) -> None:
+def generate_experiments(
+    conn: sqlite3.Connection, players: Players, rng: np.random.Generator
+) -> None:
     """
     Very simple A/B/C control experiment assignment:
     - experiment_name: "shop_pricing_v1"
@@ -512,30 +671,61 @@ def generate_experiments(conn: sqlite3.Connection, players: List[PlayerMeta]) ->
             experiment_name, player_id, variant, assigned_at_utc
         ) VALUES (?, ?, ?, ?)
     """
-    rows = []
-    for p in players:
-        variant = random.choices(
-            ["Control", "A", "B"],
-            weights=[0.5, 0.25, 0.25],
-        )[0]
-        rows.append((
-            "shop_pricing_v1",
-            p.player_id,
-            variant,
-            p.created_at.isoformat(timespec="seconds") + "Z",
-        ))
-    conn.executemany(sql, rows)
-    conn.commit()
+    day_stamps = day_timestamps(NUM_DAYS)
+
+    variants = rng.choice(
+        ["Control", "A", "B"], size=len(players), p=[0.5, 0.25, 0.25]
+    )
+
+    conn.executemany(sql, zip(
+        ["shop_pricing_v1"] * len(players),
+        players.player_id.tolist(),
+        variants.tolist(),
+        map(day_stamps.__getitem__, players.created_day_idx.tolist()),
+    ))
 
 
 # ---------------------------------------
 # Sessions, events, purchases
 # ---------------------------------------
 
+# Executed once per simulated day. sqlite3 caches prepared statements by
+# SQL text, so every day reuses the same three compiled statements.
+INSERT_SESSION_SQL = """
+    INSERT INTO sessions (
+        session_id, player_id,
+        session_start_utc, session_end_utc,
+        duration_sec, client_version, build_number,
+        country_code, platform, entry_point,
+        season_id
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+INSERT_EVENT_SQL = """
+    INSERT INTO events (
+        event_id, player_id, session_id,
+        event_time_utc, event_type,
+        game_mode, match_outcome,
+        level, match_id,
+        soft_delta, soft_currency_purchased, hard_delta,
+        metadata_json
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+INSERT_PURCHASE_SQL = """
+    INSERT INTO purchases (
+        purchase_id, player_id, session_id,
+        purchase_time_utc, product_id, product_type,
+        currency_code, price_local, price_eur, quantity,
+        grants_soft_amount, grants_hard_amount,
+        platform, country_code
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
 def generate_sessions_events_purchases(
     conn: sqlite3.Connection,
-    players: List[PlayerMeta],
+    players: Players,
     dau_curve: List[int],
+    rng: np.random.Generator,
 ) -> None:
     """
     Generate sessions, events and purchases:
@@ -545,91 +735,63 @@ def generate_sessions_events_purchases(
       engagement segment.
     - For each session, generate a match-based event stream.
     - Occasionally generate purchases, strongly depending on spend segment.
-    """
-    # Sort players by creation date
-    players_sorted = sorted(players, key=lambda p: p.created_at)
-    player_by_id = {p.player_id: p for p in players}
 
-    active_pool: List[PlayerMeta] = []
+    Each day is generated as flat NumPy arrays (one element per session,
+    match or purchase); Python only touches individual rows when they are
+    zipped into tuples for executemany.
+    """
+    # Player positions sorted by creation day
+    players_sorted = np.argsort(players.created_day_idx, kind="stable").astype(np.int32)
+    created_sorted = players.created_day_idx[players_sorted]
+
+    # Per-player string columns, gathered per session/purchase below
+    platform_names = lookup_table(PLATFORMS)[players.platform]
+    country_names = lookup_table([cc for cc, _ in COUNTRY_TZ_CHOICES])[players.country_idx]
+    entry_point_names = lookup_table(ENTRY_POINTS)
+    game_mode_names = lookup_table(GAME_MODES)
+    outcome_names = lookup_table(MATCH_OUTCOMES)
+
+    # Per-match purchase probability by spend segment
+    purchase_prob = np.zeros(len(SPEND_SEGMENTS))
+    purchase_prob[[MINNOW, DOLPHIN, WHALE]] = [0.01, 0.03, 0.10]
+    event_types = lookup_table(["match_start", "match_end"])
+    event_metadata = lookup_table([MATCH_STARTED_METADATA, MATCH_ENDED_METADATA])
+
+    # The active pool is kept sorted by churn day (with the churn days in
+    # a parallel array), so players who churned before today are always a
+    # prefix of it and can be cut off with a binary search. Player
+    # positions fit in int32, which halves the per-day copy and sample.
+    active_pool = np.empty(0, dtype=np.int32)
+    active_churn = np.empty(0, dtype=players.churn_day_idx.dtype)
     idx_new = 0
 
-    session_rows = []
-    event_rows = []
-    purchase_rows = []
-
     session_id_counter = 1
     event_id_counter = 1
     purchase_id_counter = 1
     match_id_counter = 1
 
-    # We will batch-insert periodically
-    BATCH_SIZE = 50_000
-
-    # Helper to flush batches to DB
-    def flush_batches():
-        nonlocal session_rows, event_rows, purchase_rows
-        if session_rows:
-            conn.executemany(
-                """
-                INSERT INTO sessions (
-                    session_id, player_id,
-                    session_start_utc, session_end_utc,
-                    duration_sec, client_version, build_number,
-                    country_code, platform, entry_point,
-                    season_id
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                session_rows,
-            )
-            session_rows = []
-        if event_rows:
-            conn.executemany(
-                """
-                INSERT INTO events (
-                    event_id, player_id, session_id,
-                    event_time_utc, event_type,
-                    game_mode, match_outcome,
-                    level, match_id,
-                    soft_delta, soft_currency_purchased, hard_delta,
-                    metadata_json
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                event_rows,
-            )
-            event_rows = []
-        if purchase_rows:
-            conn.executemany(
-                """
-                INSERT INTO purchases (
-                    purchase_id, player_id, session_id,
-                    purchase_time_utc, product_id, product_type,
-                    currency_code, price_local, price_eur, quantity,
-                    grants_soft_amount, grants_hard_amount,
-                    platform, country_code
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                purchase_rows,
-            )
-            purchase_rows = []
-        conn.commit()
-
-    days = daterange(START_DATE, NUM_DAYS)
-
-    for day_idx, day_start in enumerate(days):
+    for day_idx in range(NUM_DAYS):
         # Drop players who have fully churned before this day.
         # This keeps WAU/MAU from degenerating into a cumulative count of
         # "anyone who has ever played".
-        if active_pool:
-            active_pool = [p for p in active_pool if p.churn_day_idx >= day_idx]
+        expired = int(np.searchsorted(active_churn, day_idx, side="left"))
+        active_pool = active_pool[expired:]
+        active_churn = active_churn[expired:]
 
         # Add newly created players to the active pool as their creation
-        # date is reached.
-        while (idx_new < len(players_sorted) and
-               players_sorted[idx_new].created_at.date() <= day_start.date()):
-            active_pool.append(players_sorted[idx_new])
-            idx_new += 1
-
-        if not active_pool:
+        # date is reached, merged in at their churn-day position.
+        idx_end = int(np.searchsorted(created_sorted, day_idx, side="right"))
+        if idx_end > idx_new:
+            new_players = players_sorted[idx_new:idx_end]
+            new_churn = players.churn_day_idx[new_players]
+            order = np.argsort(new_churn, kind="stable")
+            new_players, new_churn = new_players[order], new_churn[order]
+            at = np.searchsorted(active_churn, new_churn, side="right")
+            active_pool = np.insert(active_pool, at, new_players)
+            active_churn = np.insert(active_churn, at, new_churn)
+            idx_new = idx_end
+
+        if not len(active_pool):
             continue
 
         # The realised DAU for the day is the smaller of the DAU target
@@ -638,211 +800,164 @@ def generate_sessions_events_purchases(
         if target_dau <= 0:
             continue
 
-        # Sample active players uniformly from eligible pool
-        active_players_today = random.sample(active_pool, target_dau)
+        # Sample active players uniformly from eligible pool (without
+        # replacement; the order of the sample does not matter)
+        today = rng.choice(active_pool, size=target_dau, replace=False, shuffle=False)
+        n_today = target_dau
 
         # Determine a season_id: 6 seasons of ~2 months
         season_id = (day_idx // 60) + 1  # 1..7 roughly, last may be shorter
 
-        for p in active_players_today:
-            # How many sessions does this player have today?
-            if p.engagement_segment == "casual":
+        # --- Session-level draws for all of today's players at once ---
+        # How many sessions does each player have today?
+        segment = players.engagement_segment[today]
+        sessions_today = np.select(
+            [segment == CASUAL, segment == MIDCORE],
+            [
                 # 1-3 sessions, with heavy probability on 1-2
-                sessions_today = random.choices(
-                    [1, 2, 3], weights=[0.6, 0.3, 0.1]
-                )[0]
-            elif p.engagement_segment == "midcore":
-                sessions_today = random.choices(
-                    [1, 2, 3, 4], weights=[0.2, 0.4, 0.3, 0.1]
-                )[0]
-            else:  # heavy
-                # Use a Pareto-like (power-law-ish) distribution, capped at 10
-                raw = int(math.floor(random.paretovariate(2.0)))
-                sessions_today = max(2, min(raw, 10))
-
-            for _ in range(sessions_today):
-                # Session local time ~ evening / late evening in player's TZ
-                local_hour = random.choices(
-                    [12, 15, 18, 20, 22],
-                    weights=[0.1, 0.2, 0.4, 0.2, 0.1],
-                )[0]
-                local_minute = random.randint(0, 59)
-                local_dt = day_start.replace(
-                    hour=local_hour, minute=local_minute, second=0
-                )
-                session_start = local_dt - timedelta(hours=p.time_zone_offset)
-                duration_sec = max(
-                    60,
-                    int(random.lognormvariate(math.log(600), 0.7)),
-                )  # lognormal with median ~10 min
-                session_end = session_start + timedelta(seconds=duration_sec)
-
-                session_id = session_id_counter
-                session_id_counter += 1
-
-                session_rows.append(
-                    (
-                        session_id,
-                        p.player_id,
-                        session_start.isoformat(timespec="seconds") + "Z",
-                        session_end.isoformat(timespec="seconds") + "Z",
-                        duration_sec,
-                        "1.0." + str(random.randint(0, 20)),  # client_version
-                        str(random.randint(1000, 2000)),      # build_number
-                        p.country_code,
-                        p.platform,
-                        random.choice(["icon_tap", "push", "reengagement_ad"]),
-                        season_id,
-                    )
-                )
-
-                # --- Events: simple match loop per session ---
-                # Decide how many matches in this session.
-                num_matches = random.choices(
-                    [0, 1, 2, 3, 4],
-                    weights=[0.1, 0.4, 0.3, 0.15, 0.05],
-                )[0]
-                if num_matches == 0:
-                    # Could still generate some non-match events if desired
-                    continue
-
-                match_start_time = session_start + timedelta(
-                    seconds=random.randint(0, duration_sec // 3)
-                )
-                for _m in range(num_matches):
-                    match_id = match_id_counter
-                    match_id_counter += 1
-
-                    # game_mode: solo, duo, team
-                    game_mode = random.choices(
-                        ["solo", "duo", "team"],
-                        weights=[0.5, 0.2, 0.3],
-                    )[0]
-                    outcome = random.choices(
-                        ["win", "loss", "draw"],
-                        weights=[0.45, 0.45, 0.10],
-                    )[0]
-
-                    # Soft currency delta, roughly increasing with outcome
-                    if outcome == "win":
-                        soft_delta = random.randint(15, 40)
-                    elif outcome == "loss":
-                        soft_delta = random.randint(5, 20)
-                    else:  # draw
-                        soft_delta = random.randint(5, 25)
-
-                    # Match start event
-                    event_rows.append(
-                        (
-                            event_id_counter,
-                            p.player_id,
-                            session_id,
-                            match_start_time.isoformat(timespec="seconds") + "Z",
-                            "match_start",
-                            game_mode,
-                            None,  # match_outcome
-                            p.level,
-                            match_id,
-                            0,  # soft_delta
-                            0,  # soft_currency_purchased
-                            0,  # hard_delta
-                            json.dumps({"note": "match_started"}),
-                        )
-                    )
-                    event_id_counter += 1
-
-                    # Match end event
-                    end_time = match_start_time + timedelta(
-                        seconds=random.randint(60, 900)
-                    )
-                    event_rows.append(
-                        (
-                            event_id_counter,
-                            p.player_id,
-                            session_id,
-                            end_time.isoformat(timespec="seconds") + "Z",
-                            "match_end",
-                            game_mode,
-                            outcome,
-                            p.level,
-                            match_id,
-                            soft_delta,
-                            0,
-                            0,
-                            json.dumps({"note": "match_ended"}),
-                        )
-                    )
-                    event_id_counter += 1
-
-                    # Chance to level up after match
-                    if random.random() < 0.05:
-                        p.level += 1
-
-                    # Soft/hard currency purchase events -> purchases table
-                    # Purchases only for paying segments
-                    if p.spend_segment != "nonpayer":
-                        # Probability of purchase depends on spend segment
-                        if p.spend_segment == "minnow":
-                            prob_purchase = 0.01
-                        elif p.spend_segment == "dolphin":
-                            prob_purchase = 0.03
-                        else:  # whale
-                            prob_purchase = 0.10
-
-                        if random.random() < prob_purchase:
-                            # Build a very simple product catalogue
-                            product = random.choices(
-                                [
-                                    ("soft_small", "SoftPack", 1.99, 500, 0),
-                                    ("soft_large", "SoftPack", 9.99, 3000, 0),
-                                    ("hard_small", "HardPack", 4.99, 0, 50),
-                                    ("hard_large", "HardPack", 19.99, 0, 300),
-                                    ("bundle", "Bundle", 9.99, 2500, 50),
-                                ],
-                                weights=[0.3, 0.2, 0.2, 0.1, 0.2],
-                            )[0]
-                            sku, ptype, price_eur, soft_grant, hard_grant = product
-
-                            purchase_time = end_time + timedelta(
-                                seconds=random.randint(5, 60)
-                            )
-                            price_cents = int(round(price_eur * 100))
-
-                            purchase_rows.append(
-                                (
-                                    purchase_id_counter,
-                                    p.player_id,
-                                    session_id,
-                                    purchase_time.isoformat(timespec="seconds") + "Z",
-                                    f"prod_{sku}",
-                                    ptype,
-                                    "EUR",
-                                    price_cents,
-                                    price_cents,
-                                    1,
-                                    soft_grant,
-                                    hard_grant,
-                                    p.platform,
-                                    p.country_code,
-                                )
-                            )
-                            purchase_id_counter += 1
-                            p.total_spend_eur += price_eur
-
-                    # Move match_start_time forward a bit for the next match
-                    match_start_time = end_time + timedelta(
-                        seconds=random.randint(10, 120)
-                    )
-
-                # Periodically flush batches to avoid huge memory usage
-                if (
-                    len(session_rows) + len(event_rows) + len(purchase_rows)
-                    >= BATCH_SIZE
-                ):
-                    flush_batches()
-
-    # Final flush
-    flush_batches()
+                CASUAL_SESSIONS_SAMPLER.sample(rng, n_today),
+                MIDCORE_SESSIONS_SAMPLER.sample(rng, n_today),
+            ],
+            # heavy: Pareto-like (power-law-ish) distribution, clamped to 2..10
+            np.clip(np.floor(rng.pareto(2.0, n_today) + 1.0), 2, 10).astype(np.int64),
+        )
+        session_players = np.repeat(today, sessions_today)
+        n_sessions = len(session_players)
+
+        # Session local time ~ evening / late evening in player's TZ,
+        # converted to seconds since START_DATE (UTC).
+        local_hour = SESSION_HOUR_SAMPLER.sample(rng, n_sessions)
+        local_minute = rng.integers(0, 59, n_sessions, endpoint=True)
+        tz_hours = players.time_zone_offset[session_players].astype(np.int64)
+        start_sec = day_idx * SECONDS_PER_DAY + (local_hour - tz_hours) * 3600 + local_minute * 60
+        duration_sec = np.maximum(
+            MIN_SESSION_SEC,
+            rng.lognormal(LOG_MEDIAN_SESSION_SEC, SESSION_SEC_SIGMA, n_sessions).astype(np.int64),
+        )
+        client_patch = rng.integers(0, 20, n_sessions, endpoint=True)
+        build_number = rng.integers(1000, 2000, n_sessions, endpoint=True)
+        entry_point = ENTRY_POINT_SAMPLER.sample(rng, n_sessions)
+
+        # --- Events: simple match loop per session ---
+        # Decide how many matches in each session, and when the first starts.
+        num_matches = MATCHES_PER_SESSION_SAMPLER.sample(rng, n_sessions)
+        first_match_offset = rng.integers(0, duration_sec // 3, endpoint=True)
+
+        session_ids = session_id_counter + np.arange(n_sessions)
+        session_id_counter += n_sessions
+
+        # Matches are laid out session by session (and so player by player),
+        # which turns per-session and per-player running values into
+        # cumulative sums within consecutive groups.
+        n_matches = int(num_matches.sum())
+        match_session = np.repeat(np.arange(n_sessions), num_matches)
+        match_player = session_players[match_session]
+        match_ids = match_id_counter + np.arange(n_matches)
+        match_id_counter += n_matches
+
+        game_mode = GAME_MODE_SAMPLER.sample(rng, n_matches)
+        outcome = MATCH_OUTCOME_SAMPLER.sample(rng, n_matches)
+
+        # Soft currency delta, roughly increasing with outcome
+        soft_delta = rng.integers(
+            SOFT_DELTA_LOW[outcome], SOFT_DELTA_HIGH[outcome], endpoint=True
+        )
+
+        # A match lasts 60-900 s and the next one starts 10-120 s after it
+        # ends; the first starts first_match_offset into the session.
+        match_length = rng.integers(60, 900, n_matches, endpoint=True)
+        match_gap = rng.integers(10, 120, n_matches, endpoint=True)
+        match_start = (start_sec + first_match_offset)[match_session] + cumsum_within_groups(
+            match_length + match_gap, num_matches
+        )
+        match_end = match_start + match_length
+
+        # Chance to level up after every match; events carry the level the
+        # player had when the match was played.
+        level_up = (rng.random(n_matches) < 0.05).astype(np.int32)
+        matches_per_player = np.add.reduceat(
+            num_matches, np.cumsum(sessions_today) - sessions_today
+        )
+        match_level = players.level[match_player] + cumsum_within_groups(
+            level_up, matches_per_player
+        )
+        np.add.at(players.level, match_player, level_up)
+
+        # Purchases only for paying segments; probability of a purchase
+        # after a match depends on spend segment.
+        bought = rng.random(n_matches) < purchase_prob[players.spend_segment[match_player]]
+        purchase_match = np.flatnonzero(bought)
+        n_purchases = len(purchase_match)
+        purchase_player = match_player[purchase_match]
+        product = PRODUCTS[PRODUCT_SAMPLER.sample(rng, n_purchases)]
+        purchase_time = match_end[purchase_match] + rng.integers(
+            5, 60, n_purchases, endpoint=True
+        )
+        np.add.at(players.total_spend_eur, purchase_player, product["price_cents"] / 100)
+
+        # --- Rows ---
+        # Each day's columns are zipped straight into executemany, so rows
+        # exist as tuples only one at a time while SQLite binds them; the
+        # timestamp and version strings are likewise produced lazily.
+        conn.executemany(INSERT_SESSION_SQL, zip(
+            session_ids.tolist(),
+            players.player_id[session_players].tolist(),
+            iso_utc_many(start_sec),
+            iso_utc_many(start_sec + duration_sec),
+            duration_sec.tolist(),
+            ("1.0." + str(v) for v in client_patch.tolist()),  # client_version
+            map(str, build_number.tolist()),                   # build_number
+            country_names[session_players].tolist(),
+            platform_names[session_players].tolist(),
+            entry_point_names[entry_point].tolist(),
+            [season_id] * n_sessions,
+        ))
+
+        # Two events per match: match_start then match_end
+        n_events = 2 * n_matches
+        event_time = np.empty(n_events, dtype=np.int64)
+        event_time[0::2] = match_start
+        event_time[1::2] = match_end
+        event_outcome = np.empty(n_events, dtype=object)  # None for match_start
+        event_outcome[1::2] = outcome_names[outcome]
+        event_soft_delta = np.zeros(n_events, dtype=np.int64)
+        event_soft_delta[1::2] = soft_delta
+
+        conn.executemany(INSERT_EVENT_SQL, zip(
+            (event_id_counter + np.arange(n_events)).tolist(),
+            np.repeat(players.player_id[match_player], 2).tolist(),
+            np.repeat(session_ids[match_session], 2).tolist(),
+            iso_utc_many(event_time),
+            np.tile(event_types, n_matches).tolist(),
+            game_mode_names[np.repeat(game_mode, 2)].tolist(),
+            event_outcome.tolist(),
+            np.repeat(match_level, 2).tolist(),
+            np.repeat(match_ids, 2).tolist(),
+            event_soft_delta.tolist(),
+            [0] * n_events,  # soft_currency_purchased
+            [0] * n_events,  # hard_delta
+            np.tile(event_metadata, n_matches).tolist(),
+        ))
+        event_id_counter += n_events
+
+        price_cents = product["price_cents"].tolist()
+        conn.executemany(INSERT_PURCHASE_SQL, zip(
+            range(purchase_id_counter, purchase_id_counter + n_purchases),
+            players.player_id[purchase_player].tolist(),
+            session_ids[match_session[purchase_match]].tolist(),
+            iso_utc_many(purchase_time),
+            product["product_id"].tolist(),
+            product["product_type"].tolist(),
+            ["EUR"] * n_purchases,  # currency_code
+            price_cents,            # price_local
+            price_cents,            # price_eur (cents)
+            [1] * n_purchases,      # quantity
+            product["soft_grant"].tolist(),
+            product["hard_grant"].tolist(),
+            platform_names[purchase_player].tolist(),
+            country_names[purchase_player].tolist(),
+        ))
+        purchase_id_counter += n_purchases
 
 
 # ---------------------------------------
@@ -850,41 +965,73 @@ def generate_sessions_events_purchases(
 # ---------------------------------------
 
 def main() -> None:
-    random.seed(RANDOM_SEED)
+    # One seeded PCG64 stream drives every random draw in the generator.
+    rng = np.random.default_rng(RANDOM_SEED)
 
     if DB_PATH.exists():
         DB_PATH.unlink()  # remove old DB
 
-    conn = sqlite3.connect(DB_PATH)
+    # Autocommit mode: the module never opens transactions implicitly, so
+    # the single explicit BEGIN/COMMIT below is the only transaction.
+    conn = sqlite3.connect(DB_PATH, isolation_level=None)
 
     # Performance pragmas: for offline one-shot data generation we can
     # safely trade durability guarantees for speed and smaller WAL/SHM
     # files. If you ever generate data in a production environment, you
     # should revisit these settings.
-    conn.execute("PRAGMA journal_mode = OFF;")
+    # The rollback journal stays in memory rather than being switched off,
+    # so a failed insert still rolls the transaction back cleanly. The page
+    # size has to be set before the first table is created.
+    conn.execute("PRAGMA page_size = 8192;")
+    conn.execute("PRAGMA journal_mode = MEMORY;")
     conn.execute("PRAGMA synchronous = OFF;")
     conn.execute("PRAGMA temp_store = MEMORY;")
     conn.execute("PRAGMA cache_size = -200000;")  # ~200 MB page cache
+    # Nobody else reads the file while it is being generated: hold the
+    # lock for the whole run and read pages through the OS page cache.
+    conn.execute("PRAGMA locking_mode = EXCLUSIVE;")
+    conn.execute("PRAGMA mmap_size = 268435456;")  # 256 MB
 
     print("Initializing database...")
-    init_db(conn, SCHEMA_PATH)
+    indexes = init_db(conn, SCHEMA_PATH)
+
+    # All inserts below run in a single transaction that is committed once
+    # at the end; the generators themselves never commit.
+    conn.execute("BEGIN")
 
     print("Generating players...")
-    players = generate_players(N_PLAYERS)
-    insert_players(conn, players)
+    players = generate_players(N_PLAYERS, rng)
+    insert_players(conn, players, rng)
 
     print("Generating teams and memberships...")
-    generate_teams_and_memberships(conn, players)
+    generate_teams_and_memberships(conn, players, rng)
 
     print("Assigning experiments...")
-    generate_experiments(conn, players)
+    generate_experiments(conn, players, rng)
 
     print("Building DAU curve...")
-    dau_curve = generate_dau_curve(NUM_DAYS)
+    dau_curve = generate_dau_curve(NUM_DAYS, rng)
 
     print("Generating sessions, events, and purchases...")
-    generate_sessions_events_purchases(conn, players, dau_curve)
+    generate_sessions_events_purchases(conn, players, dau_curve, rng)
+
+    print("Creating indexes...")
+    create_indexes(conn, indexes)
+
+    # Checked before COMMIT so that a bad load is rolled back instead of
+    # being left on disk.
+    print("Checking foreign keys...")
+    try:
+        check_foreign_keys(conn)
+    except RuntimeError:
+        conn.execute("ROLLBACK")
+        conn.close()
+        raise
+
+    # Planner statistics; inspect_db.py also reads its row counts from here.
+    conn.execute("ANALYZE")
 
+    conn.execute("COMMIT")
     conn.close()
     print("Done. Database written to:", DB_PATH)
 
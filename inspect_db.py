@@ -3,9 +3,11 @@
 Simple SQLite database explorer.
 
 Usage:
-    python inspect_db.py [path_to_db]
+    python inspect_db.py [--exact] [path_to_db]
 
 If no path is given, defaults to "mock_game2.db".
+Row counts come from the ANALYZE statistics when the database has them
+(and are labelled as such); pass --exact to always run COUNT(*).
 """
 
 import sqlite3
@@ -22,6 +24,14 @@ def get_connection(db_path: Path) -> sqlite3.Connection:
     return conn
 
 
+def quote_identifier(name: str) -> str:
+    """
+    Quote a table name for use in SQL text (table names cannot be bound
+    as parameters).
+    """
+    return '"' + name.replace('"', '""') + '"'
+
+
 def list_tables(conn: sqlite3.Connection) -> List[str]:
     """
     Return a list of user tables (excluding internal sqlite_* tables).
@@ -43,26 +53,56 @@ def get_table_info(conn: sqlite3.Connection, table_name: str) -> List[Tuple[int,
     Return PRAGMA table_info for the given table.
     Each row: (cid, name, type, notnull, dflt_value, pk)
     """
-    cur = conn.execute(f"PRAGMA table_info({table_name});")
+    cur = conn.execute(
+        """
+        SELECT cid, name, type, "notnull", dflt_value, pk
+        FROM pragma_table_info(?);
+        """,
+        (table_name,),
+    )
     return cur.fetchall()
 
 
-def get_row_count(conn: sqlite3.Connection, table_name: str) -> int:
-    cur = conn.execute(f"SELECT COUNT(*) AS cnt FROM {table_name};")
+def get_row_count(
+    conn: sqlite3.Connection, table_name: str, exact: bool = False
+) -> Tuple[int, bool]:
+    """
+    Return (row count, whether it came from ANALYZE statistics).
+
+    Unless `exact` is set and if the database has been ANALYZEd
+    (generate_mock_data.py does this), the count is read from sqlite_stat1
+    instead of scanning the table. It is a snapshot as of the last ANALYZE.
+    The first number of each stat entry is the row count of that index,
+    so the largest one is the table's (partial indexes can only be smaller).
+    """
+    if not exact:
+        try:
+            row = conn.execute(
+                "SELECT MAX(CAST(stat AS INTEGER)) AS cnt FROM sqlite_stat1 WHERE tbl = ?;",
+                (table_name,),
+            ).fetchone()
+        except sqlite3.OperationalError:  # no sqlite_stat1 table yet
+            row = None
+        if row is not None and row["cnt"] is not None:
+            return row["cnt"], True
+
+    cur = conn.execute(f"SELECT COUNT(*) AS cnt FROM {quote_identifier(table_name)};")
     row = cur.fetchone()
-    return row["cnt"] if row is not None else 0
+    return (row["cnt"] if row is not None else 0), False
 
 
 def get_sample_row(conn: sqlite3.Connection, table_name: str):
     """
     Return a single sample row from the table (or None if empty).
     """
-    cur = conn.execute(f"SELECT * FROM {table_name} LIMIT 1;")
+    cur = conn.execute(f"SELECT * FROM {quote_identifier(table_name)} LIMIT 1;")
     row = cur.fetchone()
     return row  # this is sqlite3.Row or None
 
 
-def print_table_summary(conn: sqlite3.Connection, table_name: str) -> None:
+def print_table_summary(
+    conn: sqlite3.Connection, table_name: str, exact: bool = False
+) -> None:
     print("=" * 80)
     print(f"Table: {table_name}")
     print("-" * 80)
@@ -78,8 +118,11 @@ def print_table_summary(conn: sqlite3.Connection, table_name: str) -> None:
     print()
 
     # Row count
-    count = get_row_count(conn, table_name)
-    print(f"Row count: {count}")
+    count, from_stats = get_row_count(conn, table_name, exact)
+    if from_stats:
+        print(f"Row count (ANALYZE stats): {count}")
+    else:
+        print(f"Row count: {count}")
     print()
 
     # Sample row
@@ -95,9 +138,12 @@ def print_table_summary(conn: sqlite3.Connection, table_name: str) -> None:
 
 
 def main():
-    # Determine DB path
-    if len(sys.argv) > 1:
-        db_path = Path(sys.argv[1])
+    # Determine DB path and flags
+    args = sys.argv[1:]
+    exact = "--exact" in args
+    args = [a for a in args if a != "--exact"]
+    if args:
+        db_path = Path(args[0])
     else:
         db_path = Path("mock_game2.db")
 
@@ -113,7 +159,7 @@ def main():
     print(f"Found {len(tables)} table(s): {', '.join(tables)}\n")
 
     for t in tables:
-        print_table_summary(conn, t)
+        print_table_summary(conn, t, exact)
 
     conn.close()
 
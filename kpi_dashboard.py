@@ -1,62 +1,132 @@
 from pathlib import Path
 import calendar
 
+import xlsxwriter
 from openpyxl import load_workbook
-from openpyxl.chart import BarChart, Reference
 
 # --------------------------------------------------------------------
 # Load source workbook with KPI data
+#
+# The KPI sheets are read once with a read-only (streaming) openpyxl
+# workbook; the dashboard workbook is then written from scratch with
+# xlsxwriter, like export_kpis.py does, instead of loading the whole
+# workbook DOM, editing cells one at a time and saving it again.
 # --------------------------------------------------------------------
 src_path = Path.cwd() / "kpi_dashboard_data.xlsx"
-wb = load_workbook(src_path)
+src_wb = load_workbook(src_path, read_only=True)
+sheets = {
+    ws.title: [list(row) for row in ws.iter_rows(values_only=True)]
+    for ws in src_wb.worksheets
+    if ws.title != "Dashboard"  # rebuilt below
+}
+src_wb.close()
 
 # Expected sheets
-dau_ws = wb["DAU_daily"]        # columns: day (A), dau (B)
-wau_ws = wb["WAU_weekly"]       # columns: week (A), wau (B)
-mau_ws = wb["MAU_monthly"]      # columns: month_yyyy_mm (A), mau (B)
-rev_ws = wb["Revenue_daily"]    # columns: day (A), revenue_eur (B)
-ab_ws = wb["AB_retention"]      # raw AB data
+dau_rows = sheets["DAU_daily"]        # columns: day (A), dau (B)
+wau_rows = sheets["WAU_weekly"]       # columns: week (A), wau (B)
+mau_rows = sheets["MAU_monthly"]      # columns: month_yyyy_mm (A), mau (B)
+rev_rows = sheets["Revenue_daily"]    # columns: day (A), revenue_eur (B)
+ab_rows = sheets["AB_retention"]      # raw AB data
+
+
+def set_cell(rows, row, col, value):
+    """Set a 0-based (row, col) cell in a sheet's row lists, padding as needed."""
+    while len(rows) <= row:
+        rows.append([])
+    cells = rows[row]
+    if len(cells) <= col:
+        cells.extend([None] * (col + 1 - len(cells)))
+    cells[col] = value
 
 
 # --------------------------------------------------------------------
 # 1) Build AB-retention summary: average D1 retention per variant
 # --------------------------------------------------------------------
-ab_ws["H1"] = "variant"
-ab_ws["I1"] = "avg_d1_retention"
+set_cell(ab_rows, 0, 7, "variant")
+set_cell(ab_rows, 0, 8, "avg_d1_retention")
+
+# Formulas are kept apart from the plain values ({row: {col: formula}},
+# 0-based) and written with write_formula below.
+ab_formulas = {}
+
+# Bounded ranges over the data rows rather than whole columns ($B:$B),
+# which would make Excel scan all 1,048,576 rows per variant.
+ab_last_row = len(ab_rows)
 
 variants = ["control", "A", "B"]
 for i, v in enumerate(variants, start=2):
     # Variant name
-    ab_ws[f"H{i}"] = v
+    set_cell(ab_rows, i - 1, 7, v)
     # Average D1 retention (column H) for rows with this variant (column B)
-    ab_ws[f"I{i}"] = f'=AVERAGEIF($B:$B,H{i},$H:$H)'
+    ab_formulas[i - 1] = {
+        8: f'=AVERAGEIF($B$2:$B${ab_last_row},H{i},$H$2:$H${ab_last_row})'
+    }
 
 
 # --------------------------------------------------------------------
 # 2) Add month name column to MAU sheet (Jan, Feb, ...)
 #    A: '2025-01' style, B: MAU, C: 'Jan', 'Feb', ...
 # --------------------------------------------------------------------
-mau_ws["C1"] = "month_name"
-for row in range(2, mau_ws.max_row + 1):
-    ym = str(mau_ws[f"A{row}"].value)  # e.g. '2025-01'
-    parts = ym.split("-")
-    if len(parts) == 2 and parts[1].isdigit():
-        month_idx = int(parts[1])
-        mau_ws[f"C{row}"] = calendar.month_abbr[month_idx]  # Jan, Feb, ...
-    else:
-        # Fallback: just reuse the original value
-        mau_ws[f"C{row}"] = ym
+# '01' / '1' -> 'Jan', ..., '12' -> 'Dec'
+MONTH_ABBR = {f"{m:02d}": calendar.month_abbr[m] for m in range(1, 13)}
+MONTH_ABBR.update({str(m): calendar.month_abbr[m] for m in range(1, 13)})
+
+
+def month_name(ym):
+    """Month abbreviation for a 'YYYY-MM' value; anything else is returned as is."""
+    if not isinstance(ym, str):
+        ym = str(ym)
+    # Fast path for the ISO 'YYYY-MM' values export_kpis.py writes
+    if len(ym) == 7 and ym[4] == "-":
+        return MONTH_ABBR.get(ym[5:], ym)
+    _, sep, month = ym.partition("-")
+    return MONTH_ABBR.get(month, ym) if sep else ym
+
+
+set_cell(mau_rows, 0, 2, "month_name")
+for row, cells in enumerate(mau_rows[1:], start=1):
+    set_cell(mau_rows, row, 2, month_name(cells[0]))
 
 
 # --------------------------------------------------------------------
-# 3) Get or create Dashboard sheet
+# 3) Write the data sheets and create the Dashboard sheet
 # --------------------------------------------------------------------
-if "Dashboard" in wb.sheetnames:
-    dash = wb["Dashboard"]
-else:
-    dash = wb.create_sheet("Dashboard")
+out_path = Path.cwd() / "kpi_dashboard_with_charts.xlsx"
+
+# constant_memory flushes each row as soon as the next one starts, so
+# every sheet is written strictly row by row. KPI strings are plain data:
+# skip xlsxwriter's per-cell "=formula" / URL checks (the AB formulas are
+# written with write_formula).
+workbook_options = {
+    "constant_memory": True,
+    "strings_to_formulas": False,
+    "strings_to_urls": False,
+}
+wb = xlsxwriter.Workbook(out_path, workbook_options)
+
+# Same look as the header row written by export_kpis.py
+header_format = wb.add_format(
+    {"bold": True, "border": 1, "align": "center", "valign": "top"}
+)
 
-dash["A1"] = "KPI Dashboard"
+for sheet_name, rows in sheets.items():
+    ws = wb.add_worksheet(sheet_name)
+    formulas = ab_formulas if rows is ab_rows else {}
+    for row_idx, cells in enumerate(rows):
+        ws.write_row(row_idx, 0, cells, header_format if row_idx == 0 else None)
+        for col_idx, formula in formulas.get(row_idx, {}).items():
+            ws.write_formula(row_idx, col_idx, formula)
+
+# Last used row (1-based) of every data sheet, resolved once here and
+# passed to the chart helper.
+max_rows = {sheet_name: len(rows) for sheet_name, rows in sheets.items()}
+
+dash = wb.add_worksheet("Dashboard")
+dash.write("A1", "KPI Dashboard")
+
+# openpyxl's default chart size (15 x 7.5 cm), which the layout below
+# was designed around.
+CHART_SIZE = {"width": 567, "height": 283}
 
 
 # --------------------------------------------------------------------
@@ -66,6 +136,7 @@ def add_bar_chart(
     sheet,
     title,
     data_sheet,
+    max_row,
     cat_col,
     val_col,
     pos,
@@ -79,36 +150,24 @@ def add_bar_chart(
     - Single series with uniform colour.
     - Axis labels and tick labels forced to be visible.
     """
-    max_row = data_sheet.max_row
-
-    data_ref = Reference(data_sheet, min_col=val_col, min_row=1, max_row=max_row)
-    cat_ref = Reference(data_sheet, min_col=cat_col, min_row=2, max_row=max_row)
-
-    chart = BarChart()
-    chart.title = title
-
-    chart.add_data(data_ref, titles_from_data=True)
-    chart.set_categories(cat_ref)
-
-    chart.legend = None
-    chart.varyColors = False
-
+    # xlsxwriter ranges are 0-based: [sheet, first_row, first_col, last_row, last_col]
+    chart = wb.add_chart({"type": "column"})
+    chart.add_series({
+        "name": [data_sheet, 0, val_col - 1],
+        "categories": [data_sheet, 1, cat_col - 1, max_row - 1, cat_col - 1],
+        "values": [data_sheet, 1, val_col - 1, max_row - 1, val_col - 1],
+        "fill": {"color": f"#{color}"},
+        "border": {"color": f"#{color}"},
+    })
+    chart.set_title({"name": title})
+    chart.set_legend({"none": True})
 
     # Force axis tick labels to be shown next to the axes
-    chart.x_axis.tickLblPos = "nextTo"
-    chart.y_axis.tickLblPos = "nextTo"
-    chart.x_axis.delete = False
-    chart.y_axis.delete = False
-    chart.x_axis.majorTickMark = "out"
-    chart.y_axis.majorTickMark = "out"
-
-    # Apply a single colour to the only series
-    if chart.series:
-        s = chart.series[0]
-        s.graphicalProperties.solidFill = color
-        s.graphicalProperties.line.solidFill = color
+    for axis in (chart.set_x_axis, chart.set_y_axis):
+        axis({"label_position": "next_to", "major_tick_mark": "outside"})
 
-    sheet.add_chart(chart, pos)
+    chart.set_size(CHART_SIZE)
+    sheet.insert_chart(pos, chart)
 
 
 # --------------------------------------------------------------------
@@ -119,7 +178,8 @@ def add_bar_chart(
 add_bar_chart(
     dash,
     title="DAU",
-    data_sheet=dau_ws,
+    data_sheet="DAU_daily",
+    max_row=max_rows["DAU_daily"],
     cat_col=1,
     val_col=2,
     pos="A3",
@@ -129,7 +189,8 @@ add_bar_chart(
 add_bar_chart(
     dash,
     title="WAU",
-    data_sheet=wau_ws,
+    data_sheet="WAU_weekly",
+    max_row=max_rows["WAU_weekly"],
     cat_col=1,
     val_col=2,
     pos="M3",
@@ -139,7 +200,8 @@ add_bar_chart(
 add_bar_chart(
     dash,
     title="MAU",
-    data_sheet=mau_ws,
+    data_sheet="MAU_monthly",
+    max_row=max_rows["MAU_monthly"],
     cat_col=3,  # month_name column
     val_col=2,
     pos="A18",
@@ -149,7 +211,8 @@ add_bar_chart(
 add_bar_chart(
     dash,
     title="Revenue per day (EUR)",
-    data_sheet=rev_ws,
+    data_sheet="Revenue_daily",
+    max_row=max_rows["Revenue_daily"],
     cat_col=1,
     val_col=2,
     pos="M18",
@@ -162,35 +225,34 @@ add_bar_chart(
 # --------------------------------------------------------------------
 ab_max_row = 1 + len(variants)
 
-# Data: header in I1, values I2..I4
-data_ref = Reference(ab_ws, min_col=9, min_row=1, max_row=ab_max_row)
-# Categories: H2..H4 (control, A, B)
-cat_ref = Reference(ab_ws, min_col=8, min_row=2, max_row=ab_max_row)
+ab_chart = wb.add_chart({"type": "column"})
+ab_chart.add_series({
+    # Data: header in I1, values I2..I4
+    "name": ["AB_retention", 0, 8],
+    "values": ["AB_retention", 1, 8, ab_max_row - 1, 8],
+    # Categories: H2..H4 (control, A, B)
+    "categories": ["AB_retention", 1, 7, ab_max_row - 1, 7],
+    # One series with three categories, different colours per bar
+    # (Office theme accents 1-3), like a chart with varyColors set.
+    "points": [
+        {"fill": {"color": c}} for c in ("#4472C4", "#ED7D31", "#A5A5A5")
+    ],
+})
+ab_chart.set_title({"name": "Avg D1 retention by variant"})
 
-ab_chart = BarChart()
-ab_chart.title = "Avg D1 retention by variant"
-ab_chart.add_data(data_ref, titles_from_data=True)
-ab_chart.set_categories(cat_ref)
-
-# One series with three categories, different colours per bar,
 # x-axis labels show which is control/A/B so legend is not necessary.
-ab_chart.varyColors = True
-ab_chart.legend = None
+ab_chart.set_legend({"none": True})
 
 # Make sure axis labels are visible
-ab_chart.x_axis.tickLblPos = "nextTo"
-ab_chart.y_axis.tickLblPos = "nextTo"
-ab_chart.x_axis.delete = False
-ab_chart.y_axis.delete = False
-ab_chart.x_axis.majorTickMark = "out"
-ab_chart.y_axis.majorTickMark = "out"
+for axis in (ab_chart.set_x_axis, ab_chart.set_y_axis):
+    axis({"label_position": "next_to", "major_tick_mark": "outside"})
 
-dash.add_chart(ab_chart, "A33")
+ab_chart.set_size(CHART_SIZE)
+dash.insert_chart("A33", ab_chart)
 
 
 # --------------------------------------------------------------------
 # 6) Save dashboard workbook
 # --------------------------------------------------------------------
-out_path = Path.cwd() / "kpi_dashboard_with_charts.xlsx"
-wb.save(out_path)
+wb.close()
 print("Saved:", out_path)